@@ -33,18 +33,36 @@ InvalidChecksum: ...
 Traceback (most recent call last):
     ...
 InvalidFormat: ...
+>>> validate('1' * 5000)
+Traceback (most recent call last):
+    ...
+InvalidLength: ...
+>>> validate_many(['00113918205', '00113918204', '0011391820A'])
+[True, False, False]
 >>> format('22400022111')
 '224-0002211-1'
+>>> format('2240002211')
+Traceback (most recent call last):
+    ...
+InvalidLength: ...
 """
 
-from stdnum import luhn
-from stdnum.do import rnc
+import re
+
 from stdnum.exceptions import *
-from stdnum.util import clean
+from stdnum.util import clean, clean_table
+
+
+try:
+    from functools import lru_cache
+except ImportError:  # pragma: no cover (Python 2 specific code)
+    def lru_cache(maxsize):
+        """Do not cache results on Python versions without lru_cache()."""
+        return lambda function: function
 
 
 # list of Cedulas that do not match the checksum but are nonetheless valid
-whitelist = set('''
+whitelist = frozenset('''
 00000021249 00000031417 00000035692 00000045342 00000058035 00000065377
 00000078587 00000111941 00000126295 00000129963 00000140874 00000144491
 00000155482 00000195576 00000236621 00000292212 00000302347 00000404655
@@ -145,36 +163,163 @@ whitelist = set('''
 '''.split())
 
 
+# regular expression for matching commonly formatted numbers
+_cedula_re = re.compile(r'^\s*([0-9]{3})[ -]?([0-9]{7})[ -]?([0-9])\s*$')
+
+# translation table that has the same effect as clean(number, ' -')
+_compact_table = clean_table(' -')
+
+
 def compact(number):
     """Convert the number to the minimal representation. This strips the
     number of any valid separators and removes surrounding whitespace."""
-    return clean(number, ' -').strip()
+    if type(number) is str:
+        # most numbers are passed as plain digits or in the standard format
+        if _is_digits(number):
+            return number
+        match = _cedula_re.match(number)
+        if match:
+            return ''.join(match.groups())
+    try:
+        return number.translate(_compact_table).strip()
+    except (AttributeError, TypeError):
+        return clean(number, ' -').strip()
+
+
+def _is_digits(number):
+    """Check that the number consists of exactly 11 ASCII digits."""
+    return len(number) == 11 and not number.strip('0123456789')
+
+
+# the sum of the digits of each digit after doubling it
+_doubled = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _luhn_valid(number):
+    """Check the Luhn checksum of the 11-digit number. The calculation is
+    unrolled for the fixed length: the digits at odd positions are doubled
+    and 6 * 48 is subtracted to correct for the ord() of the others."""
+    doubled = _doubled  # local lookups are faster than global ones
+    return (
+        ord(number[0]) + ord(number[2]) + ord(number[4]) + ord(number[6]) +
+        ord(number[8]) + ord(number[10]) - 288 +
+        doubled[ord(number[1]) - 48] + doubled[ord(number[3]) - 48] +
+        doubled[ord(number[5]) - 48] + doubled[ord(number[7]) - 48] +
+        doubled[ord(number[9]) - 48]) % 10 == 0
+
+
+def _check_uncached(number):
+    """Check the compacted number. This returns None if the number is valid
+    and otherwise the exception that validate() should raise."""
+    if not _is_digits(number):
+        # the whitelist also contains a few numbers of a different length
+        if number in whitelist:
+            return None
+        if len(number) != 11 and number.isdigit():
+            return InvalidLength
+        return InvalidFormat
+    # only numbers that fail the checksum need to be looked up
+    if not _luhn_valid(number) and number not in whitelist:
+        return InvalidChecksum
+    return None
+
+
+_check_cached = lru_cache(maxsize=4096)(_check_uncached)
+
+
+def _check(number):
+    """Check the compacted number, using the cache only for numbers of a
+    length that could be a cedula so that large input is not kept alive.
+
+    >>> cached = getattr(_check_cached, 'cache_info', None)  # Python 3 only
+    >>> before = cached and cached().currsize
+    >>> is_valid('1' * 5000), is_valid('x' * 5000)
+    (False, False)
+    >>> (cached and cached().currsize) == before
+    True
+    """
+    if len(number) in (10, 11):
+        return _check_cached(number)
+    return _check_uncached(number)
 
 
 def validate(number):
     """Check if the number provided is a valid cedula."""
     number = compact(number)
-    if not number.isdigit():
-        raise InvalidFormat()
-    if number in whitelist:
-        return number
-    if len(number) != 11:
-        raise InvalidLength()
-    return luhn.validate(number)
+    error = _check(number)
+    if error:
+        raise error()
+    return number
 
 
 def is_valid(number):
     """Check if the number provided is a valid cedula."""
     try:
-        return bool(validate(number))
+        number = compact(number)
     except ValidationError:
         return False
+    return _check(number) is None
+
+
+def _numpy_luhn_checksums(digits):  # pragma: no cover (needs numpy)
+    """Calculate the Luhn checksum for each row of an array of digits."""
+    import numpy
+    return (digits[:, ::2].sum(axis=1) +
+            numpy.array(_doubled)[digits[:, 1::2]].sum(axis=1)) % 10
+
+
+def _numpy_validate_many(numpy, numbers):  # pragma: no cover (needs numpy)
+    """Check the list of numbers using numpy arrays for the digit and
+    checksum tests of all 11-character numbers."""
+    result = [False] * len(numbers)
+    candidates = []
+    positions = []
+    for i, number in enumerate(numbers):
+        try:
+            number = compact(number)
+        except ValidationError:
+            continue
+        if len(number) == 11:
+            candidates.append(number)
+            positions.append(i)
+        else:
+            result[i] = is_valid(number)
+    if not candidates:
+        return result
+    digits = numpy.array(candidates, dtype='U11').view(numpy.uint32)
+    digits = digits.reshape(-1, 11).astype(numpy.int64) - 48
+    is_digits = ((digits >= 0) & (digits <= 9)).all(axis=1)
+    checksums = _numpy_luhn_checksums(digits.clip(0, 9))
+    for i, number, is_digits, checksum in zip(
+            positions, candidates, is_digits.tolist(), checksums.tolist()):
+        result[i] = is_digits and (checksum == 0 or number in whitelist)
+    return result
+
+
+def validate_many(numbers):
+    """Check which of the provided numbers are valid cedulas. This returns a
+    list of booleans, one for each number. If numpy is available the digit
+    and checksum tests are performed for all numbers at once.
+
+    >>> numbers = ['00113918205', '00113918204', '001-1391820-5', None,
+    ...            '0710208838', '00000021249', '0011391820A', '1' * 5000]
+    >>> validate_many(numbers) == [is_valid(n) for n in numbers]
+    True
+    """
+    numbers = list(numbers)
+    try:
+        import numpy
+    except ImportError:
+        return [is_valid(number) for number in numbers]
+    return _numpy_validate_many(numpy, numbers)
 
 
 def format(number):
     """Reformat the number to the standard presentation format."""
     number = compact(number)
-    return '-'.join((number[:3], number[3:-1], number[-1]))
+    if len(number) != 11 and number not in whitelist:
+        raise InvalidLength()
+    return '%s-%s-%s' % (number[:3], number[3:-1], number[-1])
 
 
 def check_dgii(number, timeout=30):  # pragma: no cover
@@ -195,11 +340,15 @@ def check_dgii(number, timeout=30):  # pragma: no cover
             'payment_regime': '2',    # 1: N/D, 2: NORMAL, 3: PST
         }
 
-    Will return None if the number is invalid or unknown."""
+    Will return None if the number is invalid or unknown. Numbers that do
+    not pass local validation are not looked up."""
     # this function isn't automatically tested because it would require
     # network access for the tests and unnecessarily load the online service
+    if not is_valid(number):
+        return None
     # we use the RNC implementation and change the rnc result to cedula
-    result = rnc.check_dgii(number)
+    from stdnum.do import rnc
+    result = rnc.check_dgii(compact(number), timeout)
     if result and 'rnc' in result:
         result['cedula'] = result.pop('rnc')
     return result
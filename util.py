@@ -129,6 +129,21 @@ def clean(number, deletechars=''):
     return ''.join(x for x in number if x not in deletechars)
 
 
+def clean_table(deletechars=''):
+    """Return a translation table for str.translate() that has the same
+    effect on Unicode strings as clean() with the specified characters.
+
+    >>> print(u'123-456:78 9'.translate(clean_table(' -:')))
+    123456789
+    """
+    table = dict(
+        (ord(k), None if v in deletechars else v)
+        for k, v in _char_map.items())
+    table.update(
+        (ord(x), None) for x in deletechars if x not in _char_map)
+    return table
+
+
 def get_number_modules(base='stdnum'):
     """Yield all the number validation modules under the specified module."""
     __import__(base)